@@ -1,7 +1,11 @@
 import sys
 import re
+import ast
 import json
+import operator
 import os
+from collections import deque
+from functools import lru_cache
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QComboBox, QLineEdit, QPushButton, QSpacerItem,
@@ -11,27 +15,52 @@ from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
 
 # ===================== 核心工具&CRC计算函数 =====================
-def crc16_modbus(data, order='little'):
-    """标准CRC16-MODBUS计算（MODBUS专用，单字节0-255输入）"""
-    crc = 0xFFFF
-    for byte in data:
-        crc ^= byte & 0xFF  # 强制单字节，防止溢出
+def _gen_crc16_modbus_table():
+    """生成CRC16-MODBUS查表（多项式0xA001，每个字节值0-255预先完成8次移位）"""
+    for byte in range(256):
+        crc = byte
         for _ in range(8):
             if crc & 0x0001:
                 crc = (crc >> 1) ^ 0xA001
             else:
                 crc >>= 1
+        yield crc
+
+# 模块加载时生成一次，计算时每字节仅需一次查表
+_CRC16_MODBUS_TABLE = tuple(_gen_crc16_modbus_table())
+
+def crc16_modbus(data, order='little'):
+    """标准CRC16-MODBUS计算（MODBUS专用，单字节0-255输入，查表法）"""
+    table = _CRC16_MODBUS_TABLE  # 绑定为局部变量，循环内免去全局查找
+    crc = 0xFFFF
+    for byte in data:
+        # & 0xFF 同时起到强制单字节的作用，防止溢出
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
     crc &= 0xFFFF  # 确保16位结果
     if order == 'little':
-        return [(crc & 0x00FF), (crc >> 8)]  # 低位在前（MODBUS默认）
+        return bytes(((crc & 0x00FF), (crc >> 8)))  # 低位在前（MODBUS默认）
     else:
-        return [(crc >> 8), (crc & 0x00FF)]  # 高位在前
+        return bytes(((crc >> 8), (crc & 0x00FF)))  # 高位在前
+
+@lru_cache(maxsize=None)
+def _crc16_modbus_zeros(length, order='little'):
+    """全零字节串的CRC16（只与字节数、字节序有关，按参数缓存）"""
+    return crc16_modbus(bytes(length), order)
+
+# 0-255对应的两位大写16进制文本（拼接结果时直接查表，免去逐字节格式化）
+_HEX2 = tuple(f"{i:02X}" for i in range(256))
+
+# 16进制字符集合（两位16进制判断直接查集合，无需正则）
+_HEXSET = frozenset('0123456789ABCDEF')
+
+# 预编译正则（模块加载时编译一次，解析时直接复用）
+_VAR_RE = re.compile(r'(?<!0X)([AB]\d{4})')          # 变量名：A/B + 4位数字（A0101/B0106）
+_HILO_RE = re.compile(r'([#$])\(([^)]+)\)')           # 高低位拆分：#(公式) / $(公式)
 
 def is_two_hex_char(text):
     """判断是否为单独的两位16进制数（0A/FF/12，无前缀）"""
     text = text.strip().upper()
-    hex_pattern = re.compile(r'^[0-9A-F]{2}$')
-    return bool(hex_pattern.match(text))
+    return len(text) == 2 and text[0] in _HEXSET and text[1] in _HEXSET
 
 def get_var_value(var_name, var_value_dict):
     """获取变量值（容错，无则返回0，强制单字节）"""
@@ -46,81 +75,200 @@ def generate_var_name(prefix, row_num, col):
     return f"{prefix}{row_num:02d}{col:02d}"
 
 # ========== #/$高低位拆分核心解析函数（适配新变量名规则） ==========
-def parse_high_low_hex(match, var_value_dict):
-    """解析 #(公式) 取高8位 / $(公式) 取低8位，返回十进制字符串"""
+# 公式允许的运算符和函数（仅基础运算 + abs/round，其余语法一律拒绝）
+_FORMULA_BIN_OPS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+    ast.Pow: operator.pow, ast.LShift: operator.lshift, ast.RShift: operator.rshift,
+    ast.BitAnd: operator.and_, ast.BitOr: operator.or_, ast.BitXor: operator.xor,
+}
+_FORMULA_UNARY_OPS = {ast.UAdd: operator.pos, ast.USub: operator.neg, ast.Invert: operator.invert}
+_FORMULA_FUNCS = {'abs': abs, 'round': round}
+
+def _build_evaluator(node):
+    """将表达式AST节点转换为求值函数 f(变量字典)，遇到不允许的语法抛出ValueError"""
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if type(value) not in (int, float):
+            raise ValueError(f"不支持的常量：{value!r}")
+        return lambda var_value_dict: value
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda var_value_dict: var_value_dict[name]
+    if isinstance(node, ast.BinOp) and type(node.op) in _FORMULA_BIN_OPS:
+        # 左结合的长运算链（A0101+A0102+…）展开为循环，避免逐层递归
+        chain = []
+        while isinstance(node, ast.BinOp) and type(node.op) in _FORMULA_BIN_OPS:
+            chain.append((_FORMULA_BIN_OPS[type(node.op)], _build_evaluator(node.right)))
+            node = node.left
+        chain.reverse()
+        first = _build_evaluator(node)
+        def eval_chain(var_value_dict):
+            result = first(var_value_dict)
+            for op, right in chain:
+                result = op(result, right(var_value_dict))
+            return result
+        return eval_chain
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _FORMULA_UNARY_OPS:
+        # 连续的一元运算（--1）同样展开为循环，由内向外依次计算
+        ops = []
+        while isinstance(node, ast.UnaryOp) and type(node.op) in _FORMULA_UNARY_OPS:
+            ops.append(_FORMULA_UNARY_OPS[type(node.op)])
+            node = node.operand
+        ops.reverse()
+        operand = _build_evaluator(node)
+        def eval_unary(var_value_dict):
+            result = operand(var_value_dict)
+            for op in ops:
+                result = op(result)
+            return result
+        return eval_unary
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in _FORMULA_FUNCS and not node.keywords):
+        func = _FORMULA_FUNCS[node.func.id]
+        args = [_build_evaluator(arg) for arg in node.args]
+        return lambda var_value_dict: func(*[arg(var_value_dict) for arg in args])
+    raise ValueError(f"不支持的语法：{type(node).__name__}")
+
+def _compile_expr(expr):
+    """解析表达式为求值函数，语法错误、含不允许的语法或嵌套过深时返回None（计算时按异常处理）"""
+    try:
+        return _build_evaluator(ast.parse(expr, mode='eval').body)
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        return None
+
+@lru_cache(maxsize=1024)
+def compile_b_formula(formula_text):
+    """
+    预编译B列公式（按公式原文缓存，只解析一次）：
+    #(公式)/$(公式) 替换为占位名_HL0/_HL1…，括号内表达式单独解析；
+    变量名A0101/B0106保留为标识符，计算时直接从变量字典取值
+    （不再把数值按文本拼入公式：A01011、B0101B0102、3A0101、#(X)5 等与数字/变量
+    紧邻的写法按非法公式计0；0X1B0101 按16进制字面量计算，不再替换其中的B0101）
+    返回 (外层求值函数, ((占位名, #或$, 括号内求值函数), ...))
+    """
+    hilo_list = []
+    def hilo_replace(m):
+        name = f"_HL{len(hilo_list)}"
+        hilo_list.append((name, m.group(1), _compile_expr(m.group(2).upper())))
+        return name
+    expr = _HILO_RE.sub(hilo_replace, formula_text).upper()
+    return (_compile_expr(expr), tuple(hilo_list))
+
+def parse_high_low_hex(symbol, evaluator, var_value_dict):
+    """计算 #(公式) 取高8位 / $(公式) 取低8位，返回十进制数值"""
     try:
-        symbol = match.group(1)  # 匹配#或$
-        expr = match.group(2)    # 匹配括号内的表达式
-        # 替换表达式中的变量（严格匹配A/B后跟4位数字：A0101/B0106）
-        def var_replace(m):
-            var = m.group(1)
-            return str(get_var_value(var, var_value_dict))
-        # 正则修改为：匹配A/B + 4位数字（两位行+两位列）
-        expr = re.sub(r'(?<!0X)([AB]\d{4})', var_replace, expr.upper())
         # 安全计算公式结果（支持0X16进制、十进制、基础运算）
-        allowed = {'__builtins__': None, 'abs': abs, 'round': round}
-        result = eval(expr, allowed)
-        result_int = int(round(result))
-        # 限制为16位数值，补零到4位16进制（确保能拆分为高低8位）
-        hex_4_str = f"{result_int & 0xFFFF:04X}"
-        # #取前两位（高8位），$取后两位（低8位），转十进制返回
+        result = evaluator(var_value_dict)
+        # 限制为16位数值（确保能拆分为高低8位）
+        result_int = int(round(result)) & 0xFFFF
+        # #取高8位，$取低8位
         if symbol == '#':
-            return str(int(hex_4_str[:2], 16))
+            return result_int >> 8
         else:
-            return str(int(hex_4_str[2:], 16))
+            return result_int & 0xFF
     except Exception:
-        return "0"  # 异常则返回0
-
-def parse_b_formula(formula_text, var_value_dict):
-    """
-    解析B列公式（#/$处理 + 变量匹配A0101/B0106格式）
-    """
+        return 0  # 异常则返回0
+
+@lru_cache(maxsize=1024)
+def _formula_deps(formula_text):
+    """预扫描公式引用的变量（去重排序），同一公式只扫描一次"""
+    return tuple(sorted(set(_VAR_RE.findall(formula_text.upper()))))
+
+@lru_cache(maxsize=4096)
+def _eval_formula(formula_text, deps, values):
+    """按（公式原文, 引用变量值）缓存计算结果：引用值不变时直接命中，无需重新解析"""
+    # 变量名直接映射为当前数值，作为公式的局部命名空间
+    var_value_dict = dict(zip(deps, values))
     try:
-        # 第一步：优先处理 #(公式) 和 $(公式) 高低位拆分
-        formula_text = re.sub(
-            r'([#$])\(([^)]+)\)',
-            lambda m: parse_high_low_hex(m, var_value_dict),
-            formula_text
-        )
-        # 第二步：替换公式中的变量（严格匹配A/B后跟4位数字）
-        def var_replace(match):
-            var = match.group(1)
-            return str(get_var_value(var, var_value_dict))
-        formula_text = re.sub(r'(?<!0X)([AB]\d{4})', var_replace, formula_text.upper())
-        
-        # 第三步：安全计算（仅允许基础运算，Python原生支持0X开头16进制）
-        allowed_builtins = {'__builtins__': None}
-        allowed_funcs = {'abs': abs, 'round': round}
-        result = eval(formula_text, allowed_builtins, allowed_funcs)
-        
+        evaluator, hilo_list = compile_b_formula(formula_text)
+
+        # 第一步：优先计算 #(公式) 和 $(公式) 高低位拆分，结果写入占位名
+        for name, symbol, hilo_evaluator in hilo_list:
+            var_value_dict[name] = parse_high_low_hex(symbol, hilo_evaluator, var_value_dict)
+
+        # 第二步：执行预解析的公式（仅允许基础运算，支持0X开头16进制）
+        result = evaluator(var_value_dict)
+
         # 强制单字节（0-255），符合MODBUS字节要求
         return int(round(result)) & 0xFF if isinstance(result, float) else result & 0xFF
     except Exception:
         return 0
 
-def parse_b_input(input_text, var_value_dict):
+# ========== B列输入预分类：每次输入变化只分类一次，计算时直接按类别取值 ==========
+KIND_EMPTY = 0     # 空输入 → 0
+KIND_HEX = 1       # 两位16进制数 → 预解析的数值
+KIND_VAR = 2       # 变量引用 → 规范化后的变量名
+KIND_FORMULA = 3   # 公式 → (公式原文, 引用的变量名元组)
+EMPTY_CELL = (KIND_EMPTY, None)
+
+def classify_b_input(input_text):
     """
-    核心解析B列输入（含#/$也判定为公式 + 匹配A0101/B0106变量）
+    B列输入预分类（含#/$也判定为公式），返回 (类别, 预解析结果)
     """
     input_text = input_text.strip()
     if not input_text:
-        return 0
+        return EMPTY_CELL
 
     # 情况1：包含运算符 或 含#/$ → 公式计算
     if any(op in input_text for op in '+-*/#$'):
-        return parse_b_formula(input_text, var_value_dict)
-    
+        return (KIND_FORMULA, (input_text, _formula_deps(input_text)))
+
     # 情况2：两位字符 → 纯16进制数（0A/FF/12）
     if len(input_text) == 2:
         try:
-            return int(input_text, 16) & 0xFF
+            return (KIND_HEX, int(input_text, 16) & 0xFF)
         except ValueError:
-            return 0
-    
+            return (KIND_HEX, 0)
+
     # 情况3：4位及以上 → 变量引用（A0101/B0106）
-    return get_var_value(input_text, var_value_dict)
+    return (KIND_VAR, input_text.upper())
+
+def eval_b_input(cell_kind, var_value_dict):
+    """按预分类结果计算B列数值（强制单字节）"""
+    kind, payload = cell_kind
+    if kind == KIND_FORMULA:
+        formula_text, deps = payload
+        values = tuple(get_var_value(var, var_value_dict) for var in deps)
+        return _eval_formula(formula_text, deps, values)
+    if kind == KIND_VAR:
+        return get_var_value(payload, var_value_dict)
+    if kind == KIND_HEX:
+        return payload
+    return 0
+
+def parse_b_input(input_text, var_value_dict):
+    """
+    核心解析B列输入（含#/$也判定为公式 + 匹配A0101/B0106变量）
+    """
+    return eval_b_input(classify_b_input(input_text), var_value_dict)
+
+def get_b_input_deps(cell_kind):
+    """由预分类结果得到B列输入引用的变量名元组"""
+    kind, payload = cell_kind
+    if kind == KIND_FORMULA:
+        return payload[1]
+    if kind == KIND_VAR:
+        return (payload,)
+    return ()
 
 # ===================== 主窗口类（严格保留原布局，仅修复变量名） =====================
+# 计算行数、每行A/B列输入框数量上限（与配置下拉框范围一致）
+MAX_ROWS = 30
+MAX_DEC = 4
+MAX_HEX = 20
+
+# 预先生成全部变量名，按[行号][列号]索引（下标0占位），计算时免去逐个格式化
+_A_NAMES = [[generate_var_name("A", row_num, col) for col in range(MAX_DEC + 1)] for row_num in range(MAX_ROWS + 1)]
+_B_NAMES = [[generate_var_name("B", row_num, col) for col in range(MAX_HEX + 1)] for row_num in range(MAX_ROWS + 1)]
+# B列变量名 → 在B列字节网格中的下标（第row行第col列 → (row-1)*MAX_HEX + col-1）
+_B_INDEX = {
+    _B_NAMES[row_num][col]: (row_num - 1) * MAX_HEX + col - 1
+    for row_num in range(1, MAX_ROWS + 1)
+    for col in range(1, MAX_HEX + 1)
+}
+_A_NAME_SET = frozenset(var_name for names in _A_NAMES[1:] for var_name in names[1:])
+
 class CRC16MODBUSCalculator(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -137,12 +285,19 @@ class CRC16MODBUSCalculator(QMainWindow):
         # 核心数据字典（全程保留原始输入，不修改）
         self.raw_text_dict = {}      # {变量名: 原始输入文本} 如{"A0101":"20", "B0106":"0A"}
         self.var_value_dict = {}     # {变量名: 解析后十进制值} 如{"A0101":20, "B0106":10}
+        self._b_vals = bytearray(MAX_ROWS * MAX_HEX)  # B列数值按行连续存放，每行的字节可直接切片
         self.row_widgets = {}        # 存储所有行控件引用，方便刷新/计算
+        self._cell_kind = {}         # {B列变量名: 预分类结果} 如{"B0106":(KIND_HEX, 10)}
+        self._deps = {}              # {B列变量名: 引用的变量名元组} 如{"B0103":("A0101",)}
+        self._rdeps = None           # {变量名: 引用它的B列变量名集合}，None表示需按_deps重建
+        self._dirty = set()          # 输入变化、待增量重算的变量名
+        self._cyclic_vars = set()    # 已提示过的循环引用B列变量名
 
-        # 防抖定时器（200ms，避免输入时频繁计算，提升界面流畅度）
+        # 防抖定时器（单次触发，最后一次输入200ms后计算一次，避免输入时频繁计算）
         self.calc_timer = QTimer()
+        self.calc_timer.setSingleShot(True)
         self.calc_timer.setInterval(200)
-        self.calc_timer.timeout.connect(self.calc_all_rows)
+        self.calc_timer.timeout.connect(self.calc_dirty_rows)
 
         # 初始化顶部菜单栏
         self.init_menu_bar()
@@ -241,8 +396,10 @@ class CRC16MODBUSCalculator(QMainWindow):
 
         # 恢复核心数据：原始文本字典
         self.raw_text_dict = config_data.get("raw_text_dict", {})
+        self._rebuild_deps()
         # 清空变量数值字典（后续会自动重新计算）
         self.var_value_dict.clear()
+        self._b_vals[:] = bytes(len(self._b_vals))
 
         # 分步恢复全局配置（触发原有布局刷新逻辑）
         self.row_combo.setCurrentText(str(total_rows))  # 恢复行数
@@ -325,6 +482,9 @@ class CRC16MODBUSCalculator(QMainWindow):
         scroll_area.setWidget(scroll_widget)
         main_layout.addWidget(scroll_area, stretch=1)
 
+        # 状态栏（启动时即创建，避免首次提示时才出现而挤压滚动区域）
+        self.status_bar = self.statusBar()
+
         # 初始化第一行计算项
         self.add_calc_row(1)
 
@@ -432,16 +592,27 @@ class CRC16MODBUSCalculator(QMainWindow):
         # 添加到滚动布局
         self.scroll_layout.addWidget(row_frame)
 
-        # 存储该行所有控件引用（完全保留）
+        # 按上限预创建A/B列输入框，列数变化时只切换显示，不再重建控件
+        dec_pool = [
+            self._create_var_input(dec_container_layout, var_name, "输入十进制")
+            for var_name in _A_NAMES[row_num][1:]
+        ]
+        hex_pool = [
+            self._create_var_input(hex_container_layout, var_name, "")
+            for var_name in _B_NAMES[row_num][1:]
+        ]
+
+        # 存储该行所有控件引用
         self.row_widgets[row_num] = {
             "frame": row_frame,
-            "dec_container": dec_container_layout,
-            "dec_inputs": {},  # {A0101: QLineEdit, A0102: QLineEdit}
-            "hex_container": hex_container_layout,
-            "hex_inputs": {},  # {B0101: QLineEdit, B0106: QLineEdit}
+            "dec_pool": dec_pool,  # [(QLabel, QLineEdit), ...] 共MAX_DEC组
+            "dec_inputs": {},  # 当前显示的 {A0101: QLineEdit, A0102: QLineEdit}
+            "hex_pool": hex_pool,  # [(QLabel, QLineEdit), ...] 共MAX_HEX组
+            "hex_inputs": {},  # 当前显示的 {B0101: QLineEdit, B0106: QLineEdit}
             "crc_input": crc_input,
             "result_input": result_input,
-            "copy_btn": copy_btn
+            "copy_btn": copy_btn,
+            "last_bytes": None  # 上次计算CRC时的B列字节，未变化则跳过重算和刷新
         }
 
         # 刷新该行的A/B列输入框
@@ -458,90 +629,58 @@ class CRC16MODBUSCalculator(QMainWindow):
             for var_name in del_var_list:
                 self.raw_text_dict.pop(var_name, None)
                 self.var_value_dict.pop(var_name, None)
-            # 清理界面控件
+                self._cell_kind.pop(var_name, None)
+                self._deps.pop(var_name, None)
+            self._rdeps = None
+            start = (row_num - 1) * MAX_HEX
+            self._b_vals[start:start + MAX_HEX] = bytes(MAX_HEX)
+            # 清理界面控件（删除行框架时其下所有子控件随之一并释放）
             self.row_widgets[row_num]["frame"].deleteLater()
             del self.row_widgets[row_num]
 
-    def refresh_dec_inputs(self, row_num):
-        """刷新A列输入框：保留原布局（宽度100），生成A0101格式变量名"""
-        row_data = self.row_widgets[row_num]
-        layout = row_data["dec_container"]
-        inputs = row_data["dec_inputs"]
-
-        # 清空原有输入框
-        self._clear_layout(layout)
+    def _create_var_input(self, layout, var_name, placeholder):
+        """创建一组变量名标签+输入框（完全保留原样式：宽度100、Consolas字体）"""
+        # 变量名标签
+        var_label = QLabel(var_name)
+        var_label.setFixedWidth(100)
+        var_label.setAlignment(Qt.AlignCenter)
+        var_label.setFont(QFont("Consolas", 10, QFont.Bold))
+        # 输入框
+        edit = QLineEdit()
+        edit.setPlaceholderText(placeholder)
+        edit.setFixedWidth(100)
+        edit.setFont(QFont("Consolas", 10))
+        # 绑定文本变化事件（变量名存于objectName，共用同一个槽函数）
+        edit.setObjectName(var_name)
+        edit.textChanged.connect(self._on_text_changed)
+        # 标签+输入框垂直布局（完全保留）
+        v_layout = QVBoxLayout()
+        v_layout.addWidget(var_label)
+        v_layout.addWidget(edit)
+        layout.addLayout(v_layout)
+        return var_label, edit
+
+    def _refresh_var_inputs(self, pool, inputs, col_count):
+        """按列数显示/隐藏预创建的输入框，并回填原始文本（不销毁、不重建控件）"""
         inputs.clear()
+        for col, (var_label, edit) in enumerate(pool, start=1):
+            visible = col <= col_count
+            var_label.setVisible(visible)
+            edit.setVisible(visible)
+            if visible:
+                var_name = edit.objectName()
+                edit.setText(self.raw_text_dict.get(var_name, ""))
+                inputs[var_name] = edit
 
-        # 按配置创建A列输入框
-        for col in range(1, self.dec_col_count + 1):
-            # 生成A+两位行+两位列（如A0101）
-            var_name = generate_var_name("A", row_num, col)
-            # 变量名标签（完全保留原样式：宽度100、Consolas字体）
-            var_label = QLabel(var_name)
-            var_label.setFixedWidth(100)
-            var_label.setAlignment(Qt.AlignCenter)
-            var_label.setFont(QFont("Consolas", 10, QFont.Bold))
-            # 十进制输入框（完全保留原样式：宽度100）
-            edit = QLineEdit()
-            edit.setPlaceholderText("输入十进制")
-            edit.setFixedWidth(100)
-            edit.setFont(QFont("Consolas", 10))
-            # 绑定文本变化事件
-            edit.textChanged.connect(lambda text, v=var_name: self.update_raw_text(v, text))
-            # 初始化值
-            if var_name in self.raw_text_dict:
-                edit.setText(self.raw_text_dict[var_name])
-            # 标签+输入框垂直布局（完全保留）
-            v_layout = QVBoxLayout()
-            v_layout.addWidget(var_label)
-            v_layout.addWidget(edit)
-            layout.addLayout(v_layout)
-            inputs[var_name] = edit
+    def refresh_dec_inputs(self, row_num):
+        """刷新A列输入框：显示前dec_col_count个A0101格式输入框"""
+        row_data = self.row_widgets[row_num]
+        self._refresh_var_inputs(row_data["dec_pool"], row_data["dec_inputs"], self.dec_col_count)
 
     def refresh_hex_inputs(self, row_num):
-        """刷新B列输入框：保留原布局（宽度100），生成B0106格式变量名"""
+        """刷新B列输入框：显示前hex_col_count个B0106格式输入框"""
         row_data = self.row_widgets[row_num]
-        layout = row_data["hex_container"]
-        inputs = row_data["hex_inputs"]
-
-        # 清空原有输入框
-        self._clear_layout(layout)
-        inputs.clear()
-
-        # 按配置创建B列输入框
-        for col in range(1, self.hex_col_count + 1):
-            # 生成B+两位行+两位列（如B0106）
-            var_name = generate_var_name("B", row_num, col)
-            # 变量名标签（完全保留原样式：宽度100、Consolas字体）
-            var_label = QLabel(var_name)
-            var_label.setFixedWidth(100)
-            var_label.setAlignment(Qt.AlignCenter)
-            var_label.setFont(QFont("Consolas", 10, QFont.Bold))
-            # B列输入框（完全保留原样式：宽度100）
-            edit = QLineEdit()
-            edit.setPlaceholderText("")
-            edit.setFixedWidth(100)
-            edit.setFont(QFont("Consolas", 10))
-            # 绑定文本变化事件
-            edit.textChanged.connect(lambda text, v=var_name: self.update_raw_text(v, text))
-            # 初始化值
-            if var_name in self.raw_text_dict:
-                edit.setText(self.raw_text_dict[var_name])
-            # 标签+输入框垂直布局（完全保留）
-            v_layout = QVBoxLayout()
-            v_layout.addWidget(var_label)
-            v_layout.addWidget(edit)
-            layout.addLayout(v_layout)
-            inputs[var_name] = edit
-
-    def _clear_layout(self, layout):
-        """递归清空布局：完全保留原逻辑"""
-        while layout.count():
-            item = layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-            elif item.layout():
-                self._clear_layout(item.layout())
+        self._refresh_var_inputs(row_data["hex_pool"], row_data["hex_inputs"], self.hex_col_count)
 
     # ===================== 全局配置变化响应（完全保留原逻辑） =====================
     def on_row_count_change(self, value):
@@ -578,32 +717,117 @@ class CRC16MODBUSCalculator(QMainWindow):
             # 更新CRC标签
             crc_label = self.row_widgets[row_num]["crc_input"].parent().findChild(QLabel)
             crc_label.setText(f"CRC16（{self.crc_order}）")
+            # 字节序变化后结果必然不同，清除跳过缓存
+            self.row_widgets[row_num]["last_bytes"] = None
         self.calc_all_rows()
 
     # ===================== 核心业务逻辑：适配新变量名规则 =====================
+    def _on_text_changed(self, text):
+        """A/B列输入框统一的文本变化槽：由发送者的objectName得到变量名"""
+        self.update_raw_text(self.sender().objectName(), text)
+
     def update_raw_text(self, var_name, text):
-        """更新原始文本：完全保留"""
+        """更新原始文本：B列同时重新预分类、更新依赖，并标记待增量重算"""
         self.raw_text_dict[var_name] = text.strip()
-        if not self.calc_timer.isActive():
-            self.calc_timer.start()
+        if var_name.startswith("B"):
+            cell_kind = classify_b_input(self.raw_text_dict[var_name])
+            self._cell_kind[var_name] = cell_kind
+            deps = get_b_input_deps(cell_kind)
+            if deps != self._deps.get(var_name, ()):
+                self._rdeps = None  # 引用关系变化，反向依赖需重建
+            self._deps[var_name] = deps
+        self._dirty.add(var_name)
+        # 每次输入都重新开始倒计时
+        self.calc_timer.start()
 
     def calc_all_rows(self):
-        """计算所有行：完全保留"""
+        """计算所有行（行列数/CRC顺序变化、导入配置时全量计算）"""
         self.calc_timer.stop()
+        self._dirty.clear()
         self.update_all_var_values()
         for row_num in self.row_widgets:
             self.calc_single_row(row_num)
 
+    def calc_dirty_rows(self):
+        """增量计算：只重算输入变化的格子及（传递）引用它们的B列，只刷新受影响的行"""
+        self.calc_timer.stop()
+        affected = self._collect_affected_vars()
+        self._dirty.clear()
+        affected = sorted(var_name for var_name in affected if self._is_active_var(var_name))
+        a_var_names = [var_name for var_name in affected if var_name.startswith("A")]
+        b_var_names = [var_name for var_name in affected if var_name.startswith("B")]
+        self.update_var_values(a_var_names, b_var_names)
+        for row_num in sorted({int(var_name[1:3]) for var_name in b_var_names}):
+            self.calc_single_row(row_num)
+
+    def _collect_affected_vars(self):
+        """从_dirty出发，沿反向依赖收集所有需要重算的变量名"""
+        if self._rdeps is None:
+            self._rdeps = {}
+            for var_name, deps in self._deps.items():
+                for dep in deps:
+                    self._rdeps.setdefault(dep, set()).add(var_name)
+        affected = set(self._dirty)
+        stack = list(self._dirty)
+        while stack:
+            for dependent in self._rdeps.get(stack.pop(), ()):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    stack.append(dependent)
+        return affected
+
+    def _is_active_var(self, var_name):
+        """变量名是否对应当前界面上的输入框（行存在且列在配置范围内）"""
+        if var_name in _B_INDEX:
+            col_count = self.hex_col_count
+        elif var_name in _A_NAME_SET:
+            col_count = self.dec_col_count
+        else:
+            return False  # 非标准变量名（如导入配置中的非法键）不参与计算
+        row_num, col = int(var_name[1:3]), int(var_name[3:5])
+        return row_num in self.row_widgets and 1 <= col <= col_count
+
     def update_all_var_values(self):
         """更新变量值：使用A0101/B0106格式变量名"""
+        a_var_names = [
+            var_name
+            for row_num in self.row_widgets
+            for var_name in _A_NAMES[row_num][1:self.dec_col_count + 1]
+        ]
+        b_var_names = [
+            var_name
+            for row_num in self.row_widgets
+            for var_name in _B_NAMES[row_num][1:self.hex_col_count + 1]
+        ]
+        # 已删除的行/隐藏的列不再计入循环引用提示记录
+        self._cyclic_vars.intersection_update(b_var_names)
+        self.update_var_values(a_var_names, b_var_names)
+
+    def update_var_values(self, a_var_names, b_var_names):
+        """更新指定A/B列变量的值（列表外的变量视为不变，直接读取当前值）"""
         # 第一步：计算A列
-        for row_num in self.row_widgets:
-            for col in range(1, self.dec_col_count + 1):
-                var_name = generate_var_name("A", row_num, col)
-                raw_text = self.raw_text_dict.get(var_name, "")
-                self.var_value_dict[var_name] = int(raw_text) if raw_text.isdigit() else 0
+        for var_name in a_var_names:
+            raw_text = self.raw_text_dict.get(var_name, "")
+            self.var_value_dict[var_name] = int(raw_text) if raw_text.isdigit() else 0
+
+        # 第二步：计算B列（嵌套引用）：按依赖拓扑序逐格计算，每格只算一次
+        order = self._topo_sort_b_vars(b_var_names)
+        # 无法排序的格子（循环引用及其下游）；已知集合去掉本次重算的格子后再并入最新结果
+        cyclic_vars = set(b_var_names).difference(order)
+        known_cyclic_vars = self._cyclic_vars
+        self._cyclic_vars = (known_cyclic_vars - set(b_var_names)) | cyclic_vars
+        if cyclic_vars:
+            # 存在循环引用：回退为多轮迭代；仅在出现新的循环引用格子时提示一次
+            if cyclic_vars - known_cyclic_vars:
+                self.status_bar.showMessage("⚠ B行存在循环引用，已按多轮迭代计算（最多5轮），结果可能不稳定", 5000)
+            self._update_b_values_fixpoint(b_var_names)
+            return
+        for var_name in order:
+            cell_kind = self._cell_kind.get(var_name, EMPTY_CELL)
+            self._set_b_value(var_name, eval_b_input(cell_kind, self.var_value_dict))
 
-        # 第二步：计算B列（嵌套引用）
+    def _update_b_values_fixpoint(self, b_var_names):
+        """多轮迭代计算B列，直到数值不再变化（最多5轮，用于循环引用）"""
         has_value_change = True
         max_attempts = 5
         current_attempt = 0
@@ -612,36 +836,78 @@ class CRC16MODBUSCalculator(QMainWindow):
             has_value_change = False
             current_attempt += 1
 
-            for row_num in self.row_widgets:
-                for col in range(1, self.hex_col_count + 1):
-                    var_name = generate_var_name("B", row_num, col)
-                    raw_text = self.raw_text_dict.get(var_name, "")
-                    old_value = self.var_value_dict.get(var_name, 0)
-                    new_value = parse_b_input(raw_text, self.var_value_dict)
-                    if new_value != old_value:
-                        self.var_value_dict[var_name] = new_value
-                        has_value_change = True
+            for var_name in b_var_names:
+                cell_kind = self._cell_kind.get(var_name, EMPTY_CELL)
+                old_value = self.var_value_dict.get(var_name, 0)
+                new_value = eval_b_input(cell_kind, self.var_value_dict)
+                if new_value != old_value:
+                    self._set_b_value(var_name, new_value)
+                    has_value_change = True
+
+    def _set_b_value(self, var_name, value):
+        """写入B列数值：字典供公式求值，字节网格供整行CRC计算"""
+        self.var_value_dict[var_name] = value
+        self._b_vals[_B_INDEX[var_name]] = value & 0xFF
+
+    def _topo_sort_b_vars(self, b_var_names):
+        """Kahn拓扑排序：被引用的B列排在前面；存在循环引用时，循环内及其下游的格子不在结果中"""
+        active = set(b_var_names)
+        in_degree = {}
+        dependents = {}
+        for var_name in b_var_names:
+            deps = [dep for dep in self._deps.get(var_name, ()) if dep in active]
+            in_degree[var_name] = len(deps)
+            for dep in deps:
+                dependents.setdefault(dep, []).append(var_name)
+
+        ready = deque(var_name for var_name in b_var_names if not in_degree[var_name])
+        order = []
+        while ready:
+            var_name = ready.popleft()
+            order.append(var_name)
+            for dependent in dependents.get(var_name, ()):
+                in_degree[dependent] -= 1
+                if not in_degree[dependent]:
+                    ready.append(dependent)
+        return order
+
+    def _rebuild_deps(self):
+        """根据原始文本重建全部B列预分类和依赖（导入配置后调用）"""
+        self._cell_kind = {
+            var_name: classify_b_input(raw_text)
+            for var_name, raw_text in self.raw_text_dict.items()
+            if var_name in _B_INDEX  # 只处理标准B列变量名，忽略导入配置中的非法键
+        }
+        self._deps = {
+            var_name: get_b_input_deps(cell_kind)
+            for var_name, cell_kind in self._cell_kind.items()
+        }
+        self._rdeps = None
 
     def calc_single_row(self, row_num):
         """计算单行结果：使用A0101/B0106格式变量名"""
         row_data = self.row_widgets[row_num]
-        b_col_dec_values = []
 
-        # 1. 收集B列数值
-        for col in range(1, self.hex_col_count + 1):
-            var_name = generate_var_name("B", row_num, col)
-            b_val = self.var_value_dict.get(var_name, 0) & 0xFF
-            b_col_dec_values.append(b_val)
+        # 1. 收集B列数值（直接切片字节网格，已强制单字节）
+        start = (row_num - 1) * MAX_HEX
+        row_bytes = bytes(self._b_vals[start:start + self.hex_col_count])
 
-        # 2. 计算CRC16
+        # 字节与上次计算时完全一致 → 结果不变，跳过CRC计算和界面刷新
+        if row_bytes == row_data["last_bytes"]:
+            return
+        row_data["last_bytes"] = row_bytes
+
+        # 2. 计算CRC16（直接传入整行bytes，调用处无需再构造整数列表）
         crc_order = 'little' if self.crc_order == "低位在前" else 'big'
-        crc_byte1, crc_byte2 = crc16_modbus(b_col_dec_values, crc_order)
-        crc_hex_str = f"{crc_byte1:02X}{crc_byte2:02X}"
+        if any(row_bytes):
+            crc_bytes = crc16_modbus(row_bytes, crc_order)
+        else:
+            # 新增行/B列为空时字节全为0，直接取缓存结果
+            crc_bytes = _crc16_modbus_zeros(len(row_bytes), crc_order)
+        crc_hex_str = crc_bytes.hex().upper()
 
-        # 3. 拼接最终结果
-        b_col_hex_list = [f"{val:02X}" for val in b_col_dec_values]
-        final_hex_list = b_col_hex_list + [f"{crc_byte1:02X}", f"{crc_byte2:02X}"]
-        final_hex_str = " ".join(final_hex_list)
+        # 3. 拼接最终结果（B列字节+CRC两字节，查表取两位16进制文本）
+        final_hex_str = " ".join([_HEX2[val] for val in row_bytes + crc_bytes])
 
         # 4. 更新显示
         row_data["crc_input"].setText(crc_hex_str)